@@ -1,14 +1,37 @@
 import argparse
+import io
+import logging
+import logging.handlers
+import multiprocessing
 import os
+import queue
+import string
+import struct
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Optional, Tuple, Iterable, Union
+from typing import Callable, Optional, Tuple, Iterable, Union
 
-from PIL import Image, ImageDraw, ImageFont, ImageColor, ImageOps
+from PIL import Image, ImageDraw, ImageFont, ImageColor, ImageOps, JpegImagePlugin
 import platform
 
+logger = logging.getLogger("watermark_cli")
+
 SUPPORTED_EXTS = {".jpg", ".jpeg", ".png", ".tif", ".tiff"}
+SUPPORTED_EXTS_TUPLE = tuple(SUPPORTED_EXTS)  # for str.endswith
+JPEG_EXTS = {".jpg", ".jpeg"}
+# (resolved font_path, font_size): hashable stand-in for a loaded font, used as a cache key.
+# A None path means Pillow's built-in bitmap font.
+FontKey = Tuple[Optional[str], int]
 EXIF_TAG_DATETIME_ORIGINAL = 36867  # DateTimeOriginal
 EXIF_TAG_DATETIME = 306             # DateTime
+EXIF_TAG_ORIENTATION = 274          # Orientation
+EXIF_TAG_EXIF_IFD = 34665           # ExifIFD pointer
+JPEG_HEADER_SCAN_BYTES = 64 * 1024
+PREFETCH_MAX_BYTES = 64 * 1024 * 1024  # files up to this size are read into memory in one go
 
 
 def parse_args() -> argparse.Namespace:
@@ -43,19 +66,56 @@ def parse_args() -> argparse.Namespace:
         default=None,
         help="可选 TrueType 字体路径，例如 C:/Windows/Fonts/arial.ttf",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="并行处理的进程数，默认使用全部 CPU 核心；1 表示单进程处理(读取/写入由后台线程与水印绘制并行进行)",
+    )
+    parser.add_argument(
+        "--max-dim",
+        type=int,
+        default=None,
+        dest="max_dim",
+        help="可选，JPEG 解码时按 1/2、1/4、1/8 缩小，使宽高均不小于该值(输出分辨率随之降低)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="强制重新处理；默认跳过输出文件已存在且不早于原图的文件",
+    )
     return parser.parse_args()
 
 
-def is_image_file(p: Path) -> bool:
-    return p.is_file() and p.suffix.lower() in SUPPORTED_EXTS
+@dataclass(frozen=True)
+class WatermarkOptions:
+    """Per-run settings shared by every file; picklable so it can be sent to worker processes."""
+    out_root: Path
+    source_root: Path
+    color_rgba: Tuple[int, int, int, int]
+    shadow_rgba: Tuple[int, int, int, int]
+    position: str
+    font_key: FontKey
+    max_dim: Optional[int] = None
+    force: bool = False
 
 
-def walk_images(root: Path) -> Iterable[Path]:
-    for dirpath, _, filenames in os.walk(root):
-        for name in filenames:
-            p = Path(dirpath) / name
-            if is_image_file(p):
-                yield p
+def walk_images(root: Union[str, Path], exclude: Optional[str] = None) -> Iterable[str]:
+    # scandir's DirEntry caches the file type from the directory listing, so no extra stat per entry.
+    # Paths are yielded as plain strings; Path objects are only built per file at the process_file boundary.
+    try:
+        entries = os.scandir(root)
+    except OSError:
+        return
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                # Skip the output directory so earlier results are not watermarked again;
+                # exclude is normalized, so "./x" and "x" compare equal
+                if exclude is None or os.path.normpath(entry.path) != exclude:
+                    yield from walk_images(entry.path, exclude)
+            elif entry.name.lower().endswith(SUPPORTED_EXTS_TUPLE) and entry.is_file():
+                yield entry.path
 
 
 def ensure_output_root(input_path: Path) -> Path:
@@ -68,14 +128,29 @@ def ensure_output_root(input_path: Path) -> Path:
     return out_root
 
 
-def exif_date_text(img: Image.Image) -> Optional[str]:
+def _get_exif_once(img: Image.Image) -> Image.Exif:
+    """Parse the image's EXIF once; callers pass the result along instead of re-reading it."""
     try:
-        exif = img.getexif()
+        return img.getexif()
     except Exception:
-        exif = None
+        return Image.Exif()
+
+
+def exif_date_text(img: Image.Image, exif: Optional[Image.Exif] = None) -> Optional[str]:
+    if exif is None:
+        exif = _get_exif_once(img)
     if not exif:
         return None
-    raw = exif.get(EXIF_TAG_DATETIME_ORIGINAL) or exif.get(EXIF_TAG_DATETIME)
+    # DateTimeOriginal normally lives in the Exif sub-IFD rather than IFD0
+    raw = (
+        exif.get(EXIF_TAG_DATETIME_ORIGINAL)
+        or exif.get_ifd(EXIF_TAG_EXIF_IFD).get(EXIF_TAG_DATETIME_ORIGINAL)
+        or exif.get(EXIF_TAG_DATETIME)
+    )
+    return _format_exif_date(raw)
+
+
+def _format_exif_date(raw: object) -> Optional[str]:
     if not raw:
         return None
     # EXIF DateTime format: "YYYY:MM:DD HH:MM:SS"
@@ -88,6 +163,63 @@ def exif_date_text(img: Image.Image) -> Optional[str]:
         return None
 
 
+def _read_ifd_dates(tiff: bytes, offset: int, endian: str) -> Tuple[dict, Optional[int]]:
+    """Read ASCII date tags from one TIFF IFD; also return the ExifIFD offset if present."""
+    dates: dict = {}
+    exif_ifd = None
+    (count,) = struct.unpack_from(endian + "H", tiff, offset)
+    for i in range(count):
+        tag, typ, n, value = struct.unpack_from(endian + "HHI4s", tiff, offset + 2 + i * 12)
+        if tag == EXIF_TAG_EXIF_IFD:
+            (exif_ifd,) = struct.unpack(endian + "I", value)
+        elif tag in (EXIF_TAG_DATETIME_ORIGINAL, EXIF_TAG_DATETIME) and typ == 2:  # ASCII
+            if n <= 4:
+                data = value[:n]
+            else:
+                (ptr,) = struct.unpack(endian + "I", value)
+                data = tiff[ptr:ptr + n]
+            dates[tag] = data.split(b"\0", 1)[0].decode("ascii", "replace")
+    return dates, exif_ifd
+
+
+def _fast_jpeg_exif_date(path: Path) -> Optional[str]:
+    """Read the raw EXIF date of a JPEG by parsing its APP1 segment directly,
+    without letting Pillow open or decode the file.
+
+    Returns None when the JPEG carries no date tag. Raises ValueError when the
+    header cannot be parsed from the first 64 KB, so callers can fall back to Pillow.
+    """
+    with open(path, "rb") as f:
+        head = f.read(JPEG_HEADER_SCAN_BYTES)
+    if head[:2] != b"\xff\xd8":
+        raise ValueError("not a JPEG stream")
+    pos = 2
+    while True:
+        if pos + 4 > len(head) or head[pos] != 0xFF:
+            raise ValueError("JPEG header exceeds scan window")
+        marker = head[pos + 1]
+        if marker in (0xDA, 0xD9):  # start of scan / end of image: no EXIF segment
+            return None
+        (seg_len,) = struct.unpack_from(">H", head, pos + 2)
+        if marker == 0xE1 and head[pos + 4:pos + 10] == b"Exif\0\0":
+            if pos + 2 + seg_len > len(head):
+                raise ValueError("EXIF segment exceeds scan window")
+            tiff = head[pos + 10:pos + 2 + seg_len]
+            break
+        pos += 2 + seg_len
+
+    try:
+        endian = {b"II": "<", b"MM": ">"}[tiff[:2]]
+        (ifd0,) = struct.unpack_from(endian + "I", tiff, 4)
+        dates, exif_ifd = _read_ifd_dates(tiff, ifd0, endian)
+        if exif_ifd and EXIF_TAG_DATETIME_ORIGINAL not in dates:
+            sub_dates, _ = _read_ifd_dates(tiff, exif_ifd, endian)
+            dates.update(sub_dates)
+    except (KeyError, struct.error):
+        return None
+    return dates.get(EXIF_TAG_DATETIME_ORIGINAL) or dates.get(EXIF_TAG_DATETIME)
+
+
 def _candidate_font_paths() -> Iterable[Path]:
     """Return a set of common system font paths to try for TrueType fonts.
     Covers Windows/macOS/Linux. Ordered by likelihood.
@@ -125,28 +257,55 @@ def _candidate_font_paths() -> Iterable[Path]:
     return [p for p in candidates if p.exists()]
 
 
-def load_font(font_path: Optional[str], size: int) -> Union[ImageFont.FreeTypeFont, ImageFont.ImageFont]:
+@lru_cache(maxsize=None)
+def _get_font(font_key: FontKey) -> Union[ImageFont.FreeTypeFont, ImageFont.ImageFont]:
+    """Load a font once per process. ImageFont objects are not reliably picklable,
+    so worker processes rebuild the font from its key on first use. The key holds the
+    path resolve_font() already settled on, so no fallback chain or warnings run here.
+    """
+    font_path, size = font_key
+    if font_path is None:
+        return ImageFont.load_default()
+    return ImageFont.truetype(font_path, size=size)
+
+
+def resolve_font(font_path: Optional[str], size: int) -> FontKey:
+    """Run the font fallback chain, warning as needed, and return the key of the font that
+    loaded. Fonts are loaded through _get_font, so the winner is parsed once and stays cached.
+    """
     # 1) user provided
     if font_path:
         try:
-            return ImageFont.truetype(font_path, size=size)
+            _get_font((font_path, size))
+            return font_path, size
         except Exception:
-            print(f"[警告] 无法加载字体: {font_path}，将尝试使用内置字体。")
-    # 2) try system common fonts
-    for p in _candidate_font_paths():
+            logger.warning(f"[警告] 无法加载字体: {font_path}，将尝试使用内置字体。")
+    # 2) try system common fonts, then 3) Pillow's DejaVuSans by name resolution
+    for candidate in [*map(str, _candidate_font_paths()), "DejaVuSans.ttf"]:
         try:
-            return ImageFont.truetype(str(p), size=size)
+            _get_font((candidate, size))
+            return candidate, size
         except Exception:
             continue
-    # 3) try Pillow's DejaVuSans by name resolution
-    try:
-        return ImageFont.truetype("DejaVuSans.ttf", size=size)
-    except Exception:
-        pass
     # 4) fallback default (fixed-size bitmap)
-    print("[警告] 未找到可用的 TrueType 字体，已回退到内置位图字体，--font-size 将不会生效。"
-          " 请使用 --font-path 指定字体，例如 C:/Windows/Fonts/msyh.ttc 或 /usr/share/fonts/.../DejaVuSans.ttf")
-    return ImageFont.load_default()
+    logger.warning("[警告] 未找到可用的 TrueType 字体，已回退到内置位图字体，--font-size 将不会生效。"
+                   " 请使用 --font-path 指定字体，例如 C:/Windows/Fonts/msyh.ttc 或 /usr/share/fonts/.../DejaVuSans.ttf")
+    _get_font((None, size))
+    return None, size
+
+
+# Common color names resolved without going through ImageColor (values match Pillow's)
+_COMMON_COLORS = {
+    "white": (255, 255, 255, 255),
+    "black": (0, 0, 0, 255),
+    "red": (255, 0, 0, 255),
+    "green": (0, 128, 0, 255),
+    "blue": (0, 0, 255, 255),
+    "yellow": (255, 255, 0, 255),
+    "gray": (128, 128, 128, 255),
+    "grey": (128, 128, 128, 255),
+}
+_HEX_DIGITS = frozenset(string.hexdigits)
 
 
 def parse_color(color: str) -> Tuple[int, int, int, int]:
@@ -154,24 +313,18 @@ def parse_color(color: str) -> Tuple[int, int, int, int]:
     # Support #AARRGGBB explicitly
     if c.startswith("#"):
         hexstr = c[1:]
-        if len(hexstr) == 8:  # AARRGGBB
-            try:
-                a = int(hexstr[0:2], 16)
-                r = int(hexstr[2:4], 16)
-                g = int(hexstr[4:6], 16)
-                b = int(hexstr[6:8], 16)
-                return r, g, b, a
-            except ValueError:
-                pass
-        elif len(hexstr) == 6:  # RRGGBB
-            try:
-                r = int(hexstr[0:2], 16)
-                g = int(hexstr[2:4], 16)
-                b = int(hexstr[4:6], 16)
-                return r, g, b, 255
-            except ValueError:
-                pass
+        # int() would also accept "0x" prefixes, signs and underscores, so check the digits first
+        if len(hexstr) in (6, 8) and _HEX_DIGITS.issuperset(hexstr):
+            v = int(hexstr, 16)
+            if len(hexstr) == 8:  # AARRGGBB
+                return (v >> 16) & 0xFF, (v >> 8) & 0xFF, v & 0xFF, (v >> 24) & 0xFF
+            # RRGGBB
+            return (v >> 16) & 0xFF, (v >> 8) & 0xFF, v & 0xFF, 255
         # Fallback to Pillow parser
+    else:
+        named = _COMMON_COLORS.get(c.lower())
+        if named:
+            return named
     try:
         rgba = ImageColor.getcolor(c, "RGBA")
         # ensure 4-tuple
@@ -179,10 +332,15 @@ def parse_color(color: str) -> Tuple[int, int, int, int]:
             rgba = (rgba[0], rgba[1], rgba[2], 255)
         return rgba  # type: ignore
     except Exception:
-        print(f"[警告] 颜色 '{color}' 无法解析，使用白色。")
+        logger.warning(f"[警告] 颜色 '{color}' 无法解析，使用白色。")
         return 255, 255, 255, 255
 
 
+def shadow_color(color_rgba: Tuple[int, int, int, int]) -> Tuple[int, int, int, int]:
+    # Black shadow, never more opaque than the text itself
+    return 0, 0, 0, min(120, color_rgba[3])
+
+
 def calc_position(img_w: int, img_h: int, text_w: int, text_h: int, pos: str, margin: int = 10) -> Tuple[int, int]:
     if pos == "top-left":
         return margin, margin
@@ -196,88 +354,348 @@ def calc_position(img_w: int, img_h: int, text_w: int, text_h: int, pos: str, ma
     return max(img_w - text_w - margin, margin), max(img_h - text_h - margin, margin)
 
 
-def draw_watermark(img: Image.Image, text: str, font: Union[ImageFont.FreeTypeFont, ImageFont.ImageFont], color_rgba: Tuple[int, int, int, int], position: str) -> Image.Image:
-    # Ensure correct orientation
-    img = ImageOps.exif_transpose(img)
+# Scratch surface used only for text measurement
+_MEASURE_DRAW = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
 
-    # Convert to RGBA for alpha-safe drawing, then back to original mode
-    orig_mode = img.mode
-    if img.mode != "RGBA":
-        base = img.convert("RGBA")
-    else:
-        base = img.copy()
-
-    txt_layer = Image.new("RGBA", base.size, (0, 0, 0, 0))
-    draw = ImageDraw.Draw(txt_layer)
 
-    # Measure text size
+@lru_cache(maxsize=64)
+def _measure_text(text: str, font_key: FontKey) -> Tuple[int, int, int, int]:
+    """Return the text bounding box when drawn at the origin; a batch only has a handful of distinct dates."""
     # Prefer textbbox for accurate size
-    bbox = draw.textbbox((0, 0), text, font=font)
+    return _MEASURE_DRAW.textbbox((0, 0), text, font=_get_font(font_key))
+
+
+@lru_cache(maxsize=64)
+def _render_sticker(text: str, font_key: FontKey, color_rgba: Tuple[int, int, int, int], shadow_rgba: Tuple[int, int, int, int]) -> Tuple[Image.Image, int, int]:
+    """Rasterize the watermark text (with shadow) once into a tight RGBA sticker.
+    Photos from the same day share the same text, so the sticker is reused across images.
+    Returns (sticker, text_w, text_h); the text origin is the sticker's top-left corner.
+    """
+    font = _get_font(font_key)
+    bbox = _measure_text(text, font_key)
     text_w = bbox[2] - bbox[0]
     text_h = bbox[3] - bbox[1]
 
-    x, y = calc_position(base.width, base.height, text_w, text_h, position)
+    # Rasterize the glyphs once into a coverage mask, then stamp it for shadow and text
+    mask_w, mask_h = max(bbox[2], 0), max(bbox[3], 0)
+    mask = Image.new("L", (mask_w, mask_h), 0)
+    ImageDraw.Draw(mask).text((0, 0), text, font=font, fill=255)
+
+    # Leave room for the 2px shadow offset
+    sticker = Image.new("RGBA", (mask_w + 2, mask_h + 2), (0, 0, 0, 0))
 
     # Optional soft shadow to improve readability
-    shadow = (0, 0, 0, min(120, color_rgba[3]))
     for dx, dy in ((1, 1), (2, 2)):
-        draw.text((x + dx, y + dy), text, font=font, fill=shadow)
+        sticker.paste(shadow_rgba, (dx, dy, dx + mask_w, dy + mask_h), mask)
+
+    sticker.paste(color_rgba, (0, 0, mask_w, mask_h), mask)
+    return sticker, text_w, text_h
 
-    draw.text((x, y), text, font=font, fill=color_rgba)
 
-    out = Image.alpha_composite(base, txt_layer)
-    if orig_mode != "RGBA":
-        out = out.convert(orig_mode)
-    return out
+def draw_watermark(img: Image.Image, text: str, font_key: FontKey, color_rgba: Tuple[int, int, int, int], position: str, exif: Optional[Image.Exif] = None, shadow_rgba: Optional[Tuple[int, int, int, int]] = None) -> Image.Image:
+    """Draw the watermark and return the result, which may be the (oriented) input image modified in place."""
+    if shadow_rgba is None:
+        shadow_rgba = shadow_color(color_rgba)
+    if exif is None:
+        exif = _get_exif_once(img)
+    # Ensure correct orientation; most photos need no rotation, so skip the full-image copy
+    # exif_transpose would make for them
+    if exif.get(EXIF_TAG_ORIENTATION, 1) != 1:
+        img = ImageOps.exif_transpose(img)
 
+    sticker, text_w, text_h = _render_sticker(text, font_key, color_rgba, shadow_rgba)
+    x, y = calc_position(img.width, img.height, text_w, text_h, position)
+
+    # Opaque RGB (e.g. JPEG): blend the sticker in place using its alpha as mask,
+    # avoiding the full-image RGBA round-trip
+    if img.mode == "RGB":
+        img.paste(sticker, (x, y), sticker)
+        return img
+
+    # Convert to RGBA for alpha-safe drawing, then back to original mode
+    orig_mode = img.mode
+    base = img if orig_mode == "RGBA" else img.convert("RGBA")
+
+    # Composite only the sticker's region; clip it if it starts outside the image
+    base.alpha_composite(sticker, (max(x, 0), max(y, 0)), (max(-x, 0), max(-y, 0)))
+
+    if base.mode != orig_mode:
+        return base.convert(orig_mode)
+    return base
+
+
+@dataclass
+class _LoadedImage:
+    """A decoded image travelling through the read -> watermark -> write stages."""
+    in_file: Path
+    out_path: Path
+    image: Image.Image
+    text: str
+    fmt: str
+    exif: Image.Exif
+    exif_bytes: Optional[bytes]
+    encoder_kwargs: dict
+
+
+def _open_image(in_file: Path) -> Image.Image:
+    """Open an image from one bulk read instead of Pillow's many small reads, which are
+    slow on network shares (e.g. tiled TIFFs). Very large files are opened from disk to bound memory.
+    """
+    if in_file.stat().st_size <= PREFETCH_MAX_BYTES:
+        return Image.open(io.BytesIO(in_file.read_bytes()))
+    return Image.open(in_file)
+
+
+def _jpeg_keep_kwargs(im: Image.Image) -> dict:
+    """Save settings equivalent to quality="keep": reuse the source JPEG's quantization tables
+    and chroma subsampling. "keep" itself only works on the opened JpegImageFile, not on the
+    watermarked copy, so the settings are captured while the source is still at hand.
+    """
+    qtables = getattr(im, "quantization", None)
+    subsampling = JpegImagePlugin.get_sampling(im)
+    if not qtables or subsampling == -1:
+        return {"quality": 95, "subsampling": 2}
+    return {"qtables": qtables, "subsampling": subsampling}
 
-def process_file(in_file: Path, out_root: Path, source_root: Path, font: Union[ImageFont.FreeTypeFont, ImageFont.ImageFont], color_rgba: Tuple[int, int, int, int], position: str) -> None:
+
+def _output_path(in_file: Path, opts: WatermarkOptions) -> Path:
+    # Build output path relative to the provided source root
     try:
-        with Image.open(in_file) as im:
-            text = exif_date_text(im)
-            if not text:
-                print(f"[跳过] 无 EXIF 日期: {in_file}")
-                return
-            out_img = draw_watermark(im, text, font, color_rgba, position)
+        rel_path = in_file.relative_to(opts.source_root)
+    except Exception:
+        rel_path = Path(in_file.name)
+    return (opts.out_root / rel_path).with_suffix(in_file.suffix)
 
-            # Build output path relative to the provided source root
-            try:
-                rel_path = in_file.relative_to(source_root)
-            except Exception:
-                rel_path = Path(in_file.name)
 
-            out_path = out_root / rel_path
-            out_path.parent.mkdir(parents=True, exist_ok=True)
+def _is_up_to_date(in_file: Path, out_path: Path) -> bool:
+    try:
+        return out_path.stat().st_mtime >= in_file.stat().st_mtime
+    except OSError:
+        return False
 
-            save_kwargs = {}
-            # try preserve original format
-            fmt = (im.format or "PNG").upper()
-            if fmt == "JPEG":
-                save_kwargs.update({"quality": 95, "subsampling": 2})
-            # Best effort keep EXIF except orientation to avoid double-rotation
+
+def _read_stage(in_file: Union[str, Path], opts: WatermarkOptions) -> Optional[_LoadedImage]:
+    """Read and decode one file (I/O bound); returns None if it is skipped or fails."""
+    in_file = Path(in_file)
+    try:
+        out_path = _output_path(in_file, opts)
+        if not opts.force and _is_up_to_date(in_file, out_path):
+            logger.info(f"[跳过] 输出已是最新: {in_file}")
+            return None
+
+        text = None
+        if in_file.suffix.lower() in JPEG_EXTS:
+            # Cheap header-only check so EXIF-less JPEGs are skipped without opening them in Pillow
             try:
-                exif_bytes = im.info.get("exif")
-                if exif_bytes and fmt in {"JPEG", "TIFF"}:
-                    save_kwargs["exif"] = exif_bytes
-            except Exception:
-                pass
-
-            out_path = out_path.with_suffix(in_file.suffix)
-            out_img.save(out_path, format=fmt, **save_kwargs)
-            print(f"[完成] {in_file} -> {out_path}")
+                text = _format_exif_date(_fast_jpeg_exif_date(in_file))
+                if not text:
+                    logger.info(f"[跳过] 无 EXIF 日期: {in_file}")
+                    return None
+            except ValueError:
+                text = None
+        with _open_image(in_file) as im:
+            # Capture format and raw EXIF at open: the watermarked image is a different
+            # object whose info no longer carries them
+            fmt = (im.format or "PNG").upper()
+            exif_bytes = im.info.get("exif")
+            exif = _get_exif_once(im)
+            if text is None:
+                text = exif_date_text(im, exif)
+            if not text:
+                logger.info(f"[跳过] 无 EXIF 日期: {in_file}")
+                return None
+            if opts.max_dim and fmt == "JPEG":
+                # Let libjpeg downscale by 1/2, 1/4 or 1/8 during decoding
+                im.draft(im.mode, (opts.max_dim, opts.max_dim))
+            im.load()
+            encoder_kwargs = _jpeg_keep_kwargs(im) if fmt == "JPEG" else {}
+            return _LoadedImage(in_file, out_path, im, text, fmt, exif, exif_bytes, encoder_kwargs)
     except Exception as e:
-        print(f"[错误] 处理失败 {in_file}: {e}")
+        logger.error(f"[错误] 处理失败 {in_file}: {e}")
+        return None
+
+
+def _watermark_stage(item: _LoadedImage, opts: WatermarkOptions) -> Optional[_LoadedImage]:
+    """Draw the watermark (CPU bound); returns None on failure."""
+    try:
+        item.image = draw_watermark(item.image, item.text, opts.font_key, opts.color_rgba, opts.position, item.exif, opts.shadow_rgba)
+        return item
+    except Exception as e:
+        logger.error(f"[错误] 处理失败 {item.in_file}: {e}")
+        return None
+
+
+def _save_atomic(img: Image.Image, out_path: Path, fmt: str, save_kwargs: dict) -> None:
+    """Encode into memory, write it with one large write, then rename into place.
+    Avoids the encoder's many small writes and never leaves a partially written output.
+    """
+    buf = io.BytesIO()
+    img.save(buf, format=fmt, **save_kwargs)
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    try:
+        tmp_path.write_bytes(buf.getbuffer())
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def _write_stage(item: _LoadedImage, opts: WatermarkOptions) -> None:
+    """Encode and save the watermarked image (I/O bound)."""
+    in_file = item.in_file
+    try:
+        out_path = item.out_path
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+
+        save_kwargs = dict(item.encoder_kwargs)
+        fmt = item.fmt
+        # Best effort keep EXIF except orientation to avoid double-rotation
+        exif_bytes = item.exif_bytes
+        if exif_bytes and item.exif.get(EXIF_TAG_ORIENTATION, 1) != 1:
+            # Pixels were already rotated; re-serialize the parsed EXIF with the tag reset
+            item.exif[EXIF_TAG_ORIENTATION] = 1
+            exif_bytes = item.exif.tobytes()
+        if exif_bytes and fmt in {"JPEG", "TIFF"}:
+            save_kwargs["exif"] = exif_bytes
+
+        _save_atomic(item.image, out_path, fmt, save_kwargs)
+        logger.info(f"[完成] {in_file} -> {out_path}")
+    except Exception as e:
+        logger.error(f"[错误] 处理失败 {in_file}: {e}")
+
+
+def process_file(in_file: Union[str, Path], opts: WatermarkOptions) -> None:
+    item = _read_stage(in_file, opts)
+    if item is not None:
+        item = _watermark_stage(item, opts)
+    if item is not None:
+        _write_stage(item, opts)
+
+
+_STAGE_DONE = object()
+
+
+def _stage_worker(func: Callable, inbox: queue.Queue, outbox: Optional[queue.Queue]) -> None:
+    while True:
+        item = inbox.get()
+        if item is _STAGE_DONE:
+            return
+        try:
+            result = func(item)
+        except Exception:
+            # Stages report their own per-file errors, so reaching here is a bug; report it
+            # and keep draining so upstream puts never block forever
+            logger.exception(f"[错误] 处理失败 {getattr(item, 'in_file', item)}")
+            continue
+        if result is not None and outbox is not None:
+            outbox.put(result)
+
+
+def process_pipelined(files: Iterable[Union[str, Path]], opts: WatermarkOptions, io_threads: int = 4) -> int:
+    """Process files in one process with I/O overlapped with compute: reader threads decode
+    and writer threads encode/save, while the calling thread draws watermarks. Pillow releases
+    the GIL during codec work, so this keeps both the disk and the CPU busy.
+    Returns the number of files seen.
+    """
+    # The watermark stage has a single consumer, so deeper queues add no throughput and only
+    # hold more decoded images in memory; keep them as deep as the thread pools feeding them
+    paths: queue.Queue = queue.Queue(maxsize=io_threads)
+    loaded: queue.Queue = queue.Queue(maxsize=io_threads)
+    to_write: queue.Queue = queue.Queue(maxsize=io_threads)
+
+    readers = [threading.Thread(target=_stage_worker, args=(partial(_read_stage, opts=opts), paths, loaded), daemon=True)
+               for _ in range(io_threads)]
+    writers = [threading.Thread(target=_stage_worker, args=(partial(_write_stage, opts=opts), to_write, None), daemon=True)
+               for _ in range(io_threads)]
+    for t in readers + writers:
+        t.start()
+
+    counter = [0]
+
+    def feed() -> None:
+        try:
+            for in_file in files:
+                paths.put(in_file)
+                counter[0] += 1
+        finally:
+            for _ in readers:
+                paths.put(_STAGE_DONE)
+            for t in readers:
+                t.join()
+            loaded.put(_STAGE_DONE)
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+
+    # Watermark stage runs on the calling thread
+    _stage_worker(partial(_watermark_stage, opts=opts), loaded, to_write)
+
+    for _ in writers:
+        to_write.put(_STAGE_DONE)
+    for t in writers:
+        t.join()
+    feeder.join()
+    return counter[0]
+
+
+# Set once per worker process by _init_worker, so tasks only carry the file path
+_worker_opts: Optional[WatermarkOptions] = None
+
+
+def _init_worker(opts: WatermarkOptions, log_queue: multiprocessing.Queue) -> None:
+    global _worker_opts
+    _worker_opts = opts
+    # Hand log records to the parent instead of contending for stdout across processes
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(logging.INFO)
+    # A no-op when the font was inherited through fork
+    _get_font(opts.font_key)
+
+
+def _process_in_worker(in_file: str) -> None:
+    process_file(in_file, _worker_opts)
+
+
+def process_all(files: Iterable[Union[str, Path]], opts: WatermarkOptions, jobs: Optional[int] = None) -> int:
+    """Process files across a pool of worker processes; returns the number of files seen.
+    With a single job, files go through the threaded I/O pipeline instead.
+    """
+    if jobs == 1:
+        return process_pipelined(files, opts)
+    # On Linux, fork lets workers inherit the font main() already loaded (and its FreeType
+    # state). Elsewhere (spawn) each worker loads it once in _init_worker.
+    mp_context = multiprocessing.get_context("fork" if sys.platform.startswith("linux") else None)
+    # Workers log through a queue; the parent's listener is the only writer to the real handlers
+    log_queue = mp_context.Queue()
+    listener = logging.handlers.QueueListener(log_queue, *logging.getLogger().handlers)
+    listener.start()
+    count = 0
+    try:
+        with ProcessPoolExecutor(
+            max_workers=jobs,  # None: the executor picks the default (capped at 61 on Windows)
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=(opts, log_queue),
+        ) as ex:
+            # Each file is independent; results are only consumed for counting
+            for _ in ex.map(_process_in_worker, files, chunksize=4):
+                count += 1
+    finally:
+        listener.stop()
+    return count
 
 
 def main():
     args = parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
 
     # 交互模式：未提供 path 时提示输入，并可选择修改其余参数
     if args.path is None:
-        print("[交互] 未提供路径，进入交互模式。直接回车采用默认值。")
+        logger.info("[交互] 未提供路径，进入交互模式。直接回车采用默认值。")
         path_input = input("请输入图片文件或目录路径: ").strip()
         if not path_input:
-            print("[错误] 未输入路径，已退出。")
+            logger.error("[错误] 未输入路径，已退出。")
             return
         input_path = Path(path_input)
 
@@ -287,7 +705,7 @@ def main():
             if fs_in:
                 args.font_size = int(fs_in)
         except Exception:
-            print("[提示] 字体大小输入无效，使用默认值。")
+            logger.info("[提示] 字体大小输入无效，使用默认值。")
         color_in = input(f"颜色(默认 {args.color}): ").strip()
         if color_in:
             args.color = color_in
@@ -295,7 +713,7 @@ def main():
         if pos_in in {"top-left","top-right","center","bottom-left","bottom-right"}:
             args.position = pos_in
         elif pos_in:
-            print("[提示] 位置输入无效，使用默认值。")
+            logger.info("[提示] 位置输入无效，使用默认值。")
         font_in = input("字体文件路径(可选，默认空): ").strip()
         if font_in:
             args.font_path = font_in
@@ -303,26 +721,40 @@ def main():
         input_path = Path(args.path)
 
     if not input_path.exists():
-        print(f"[错误] 路径不存在: {input_path}")
+        logger.error(f"[错误] 路径不存在: {input_path}")
+        return
+
+    if args.jobs is not None and args.jobs < 1:
+        logger.error(f"[错误] --jobs 必须为正整数: {args.jobs}")
+        return
+    if args.max_dim is not None and args.max_dim < 1:
+        logger.error(f"[错误] --max-dim 必须为正整数: {args.max_dim}")
         return
 
     color_rgba = parse_color(args.color)
-    font = load_font(args.font_path, args.font_size)
+    # Resolve and load the font once up front so fallback warnings are reported once, before any work starts
+    font_key = resolve_font(args.font_path, args.font_size)
 
     out_root = ensure_output_root(input_path if input_path.is_dir() else input_path)
 
+    opts = WatermarkOptions(
+        out_root=out_root,
+        source_root=input_path.parent if input_path.is_file() else input_path,
+        color_rgba=color_rgba,
+        shadow_rgba=shadow_color(color_rgba),
+        position=args.position,
+        font_key=font_key,
+        max_dim=args.max_dim,
+        force=args.force,
+    )
+
     if input_path.is_file():
-        source_root = input_path.parent
-        process_file(input_path, out_root, source_root, font, color_rgba, args.position)
+        process_file(input_path, opts)
     else:
         # directory: walk and mirror structure
-        source_root = input_path
-        count = 0
-        for img_path in walk_images(input_path):
-            process_file(img_path, out_root, source_root, font, color_rgba, args.position)
-            count += 1
+        count = process_all(walk_images(input_path, exclude=os.path.normpath(out_root)), opts, args.jobs)
         if count == 0:
-            print("[提示] 目录中未找到支持的图片文件。")
+            logger.info("[提示] 目录中未找到支持的图片文件。")
 
 
 if __name__ == "__main__":